@@ -1,14 +1,9 @@
 #! python3
 import sys
-import gc
+import os.path as op
 
-gc.collect()
+sys.path.append(op.dirname(__file__))
+import leaks
 
-for o in gc.get_objects():
-    if 'CustomDrawable' in repr(o):
-        t = repr(type(o))
-        if 'wrapper_descriptor' in t \
-                or 'clr._internal.CLRMetatype' in t \
-                or 'function' in t \
-                or 'weakref' in t:
-            print(f"{sys.getrefcount(o)} {o}")
+for o in leaks.find_named('CustomDrawable'):
+    print(f"{sys.getrefcount(o)} {leaks.type_name(type(o))} {leaks.object_name(o)}")
@@ -0,0 +1,177 @@
+"""Find leftover objects and track object count growth.
+
+Objects are matched by type identity and by the module of their type, and
+named from their __qualname__, so repr is never called on them. A Snapshot
+is a count of gc tracked objects per type, optionally with a tracemalloc
+snapshot, and two snapshots can be diffed to see what grew:
+
+    before = leaks.Snapshot.take(modules={"__main__"})
+    run_the_test()
+    after = leaks.Snapshot.take(modules={"__main__"})
+    growth = before.diff(after)
+    assert not growth["types"], leaks.format_growth(growth)
+
+Call tracemalloc.start() before the first snapshot to get the allocation
+sites that grew too. tracemalloc does not know the type of an allocation,
+so the sites are of all growth between the snapshots, not of one type.
+"""
+import gc
+import types
+import weakref
+import tracemalloc
+from collections import Counter
+
+
+# types that keep a class alive after its instances are gone
+LEFTOVER_TYPES = {
+    type,
+    types.FunctionType,
+    types.WrapperDescriptorType,
+    types.MethodDescriptorType,
+    weakref.ReferenceType,
+}
+
+# objects that are named by their own __qualname__, for anything else the
+# name of its type is used
+_NAMED_TYPES = (
+    type,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.WrapperDescriptorType,
+    types.MethodDescriptorType,
+)
+
+
+def type_name(obj_type):
+    """Full name of a type, e.g. builtins.function"""
+    return "{}.{}".format(
+        getattr(obj_type, "__module__", "?"), getattr(obj_type, "__qualname__", "?")
+    )
+
+
+def object_name(obj):
+    """Qualified name of a class, function or descriptor, or of the type of
+    any other object. Weak references are named by their referent."""
+    if isinstance(obj, weakref.ReferenceType):
+        obj = obj()
+        if obj is None:
+            return None
+    # classes made by metatypes other than type are still instances of type
+    if isinstance(obj, _NAMED_TYPES):
+        return getattr(obj, "__qualname__", None)
+    return type(obj).__qualname__
+
+
+def _leftover_types():
+    leftover = set(LEFTOVER_TYPES)
+    # pythonnet creates classes derived from .NET types with its own
+    # metatype
+    try:
+        import System
+
+        leftover.add(type(System.Object))
+    except ImportError:
+        pass
+    return leftover
+
+
+def iter_objects(obj_types=None, modules=None):
+    """gc tracked objects of obj_types and of types defined in modules.
+
+    Both filters are optional, with neither every tracked object is
+    returned.
+    """
+    for obj in gc.get_objects():
+        obj_type = type(obj)
+        if obj_types is not None and obj_type not in obj_types:
+            continue
+        if modules is not None and obj_type.__module__ not in modules:
+            continue
+        yield obj
+
+
+def find_named(name, obj_types=None):
+    """Collect garbage and return the objects whose name contains name.
+
+    By default only classes, functions, descriptors and weak references are
+    checked, which are the objects that keep a leaked class alive.
+    """
+    gc.collect()
+    if obj_types is None:
+        obj_types = _leftover_types()
+    return [x for x in iter_objects(obj_types) if name in (object_name(x) or "")]
+
+
+class Snapshot:
+    """Number of gc tracked objects per type name."""
+
+    def __init__(self, counts, traces=None):
+        self.counts = counts
+        self.traces = traces
+
+    def __repr__(self):
+        return "<Snapshot Types:{} Objects:{}>".format(
+            len(self.counts), sum(self.counts.values())
+        )
+
+    @classmethod
+    def take(cls, obj_types=None, modules=None):
+        """Collect garbage and count the objects, see iter_objects.
+
+        The tracemalloc snapshot is only taken if tracemalloc is tracing.
+        """
+        gc.collect()
+        counts = Counter(type(x) for x in iter_objects(obj_types, modules))
+        traces = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        return cls({type_name(k): v for k, v in counts.items()}, traces)
+
+    def diff(self, later, min_growth=1, traceback_limit=3):
+        """Types that grew by at least min_growth objects until later.
+
+        Returns:
+            dict: types is a list of the type, before, after and growth of
+                  each grown type, largest growth first. sites is a list of
+                  the top traceback_limit allocation sites that grew, empty
+                  without tracemalloc snapshots or grown types
+        """
+        growth = []
+        for name, after in later.counts.items():
+            before = self.counts.get(name, 0)
+            if after - before >= min_growth:
+                growth.append(
+                    {
+                        "type": name,
+                        "before": before,
+                        "after": after,
+                        "growth": after - before,
+                    }
+                )
+        growth.sort(key=lambda x: (-x["growth"], x["type"]))
+
+        sites = []
+        if growth and self.traces is not None and later.traces is not None:
+            stats = later.traces.compare_to(self.traces, "traceback")
+            grown = [x for x in stats if x.count_diff > 0]
+            sites = [
+                {
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                    "traceback": stat.traceback.format(),
+                }
+                for stat in grown[:traceback_limit]
+            ]
+        return {"types": growth, "sites": sites}
+
+
+def format_growth(growth):
+    """One line per grown type, e.g. +3 __main__.CustomDrawable (1 -> 4),
+    then the allocation sites that grew"""
+    lines = []
+    for item in growth["types"]:
+        lines.append("+{growth} {type} ({before} -> {after})".format(**item))
+    if growth["sites"]:
+        lines.append("allocation sites:")
+        for site in growth["sites"]:
+            lines.append("  +{count_diff} blocks +{size_diff} bytes".format(**site))
+            lines.extend("    " + x for x in site["traceback"])
+    return "\n".join(lines)
@@ -0,0 +1,214 @@
+#! python3
+"""Input marshalling benchmark matrix for test_perf_lotsOfRounds.ghx
+
+Solves the definition for every input size in SIZES and records the
+processor time of each script component. Components are labelled with the
+matrix cell they measure: language, input access, type hint and the group
+they are in. One record per run is appended to HISTORY so marshalling
+regressions can be compared across Rhino builds.
+
+Labels are read from the .ghx file, so every script component in the
+definition is measured, including the C# and tree access ones.
+"""
+import os
+import os.path as op
+import json
+import datetime
+import xml.etree.ElementTree as ET
+from statistics import mean, pstdev
+
+import System
+from System import Guid
+
+from Rhino import RhinoApp
+
+
+DEFINITION = op.join(op.dirname(__file__), "test_perf_lotsOfRounds.ghx")
+HISTORY = op.join(op.dirname(__file__), "test_perf_lotsOfRounds_history.json")
+
+SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+ROUNDS = 5
+
+# input of the Series component that sets the number of values
+SIZE_COMPONENT = "Series"
+SIZE_INPUT = "Count"
+
+GH_ID = Guid("B45A29B1-4343-4035-989E-044E8580D9CF")
+GH_GROUP = "c552a431-af5b-46a9-a8a4-0fcbc27ef596"
+
+# component guid -> language, None means read from the LanguageSpec
+LANGUAGES = {
+    "410755b1-224a-4c1e-a407-bf32fb45ea7e": "IronPython (GhPython)",
+    "719467e6-7cf5-4848-99b0-c5dd57e5442c": "Python 3",
+    "c9b2d725-6f87-4b07-af90-bd9aefef68eb": None,
+}
+TAXONS = {
+    ("python", "3"): "Python 3",
+    ("python", "2"): "IronPython",
+    ("csharp", ""): "C#",
+}
+
+ACCESS = {0: "item", 1: "list", 2: "tree"}
+
+TYPE_HINTS = {
+    "6a184b65-baa3-42d1-a548-3915b401de53": "none",
+    "35915213-5534-4277-81b8-1bdc9e7383d2": "none",
+    "9d51e32e-c038-4352-9554-f4137ca91b9a": "float",
+    "39fbc626-7a01-46ab-a18e-ec1c0c41685b": "float",
+}
+
+
+def _items(chunk):
+    items = chunk.find("items")
+    return [] if items is None else items.findall("item")
+
+
+def _item(chunk, name, default=None):
+    for item in _items(chunk):
+        if item.get("name") == name:
+            return item.text
+    return default
+
+
+def _language(obj, container):
+    language = LANGUAGES[_item(obj, "GUID")]
+    if language is not None:
+        return language
+
+    spec = container.find(".//chunk[@name='LanguageSpec']")
+    if spec is None:
+        return "unknown"
+    taxon = _item(spec, "Taxon", "").split(".")[-1]
+    version = _item(spec, "Version", "").split(".")[0]
+    return TAXONS.get((taxon, version), TAXONS.get((taxon, ""), taxon))
+
+
+def read_matrix(ghx_file):
+    """Matrix cell of each script component and the size slider guid."""
+    root = ET.parse(ghx_file).getroot()
+    objects = root.findall(".//chunk[@name='DefinitionObjects']/chunks/chunk")
+
+    groups = {}
+    cells = {}
+    size_slider = None
+    for obj in objects:
+        container = obj.find("chunks/chunk[@name='Container']")
+        guid = _item(obj, "GUID")
+        instance = _item(container, "InstanceGuid")
+
+        if guid == GH_GROUP:
+            for item in _items(container):
+                if item.get("name") == "ID":
+                    groups[item.text] = _item(container, "NickName")
+
+        elif guid in LANGUAGES:
+            inputs = container.findall(".//chunk[@name='InputParam']")
+            accesses = sorted(
+                {
+                    ACCESS[int(_item(p, "ScriptParamAccess", _item(p, "Access", 0)))]
+                    for p in inputs
+                }
+            )
+            hints = sorted(
+                {
+                    TYPE_HINTS.get(_item(p, "TypeHintID"), _item(p, "TypeHintID"))
+                    for p in inputs
+                    if _item(p, "TypeHintID")
+                }
+            )
+            cells[instance] = {
+                "component": _item(container, "NickName"),
+                "language": _language(obj, container),
+                "access": "+".join(accesses),
+                "type_hint": "+".join(hints) or "none",
+            }
+
+        elif _item(container, "NickName") == SIZE_COMPONENT:
+            for param in container.findall(".//chunk[@name='param_input']"):
+                if _item(param, "NickName") == SIZE_INPUT:
+                    size_slider = _item(param, "Source")
+
+    for instance, cell in cells.items():
+        cell["group"] = groups.get(instance, "")
+    return cells, size_slider
+
+
+def _load_document(ghx_file):
+    # loads Grasshopper if it is not loaded yet
+    RhinoApp.GetPlugInObject(GH_ID)
+    import Grasshopper as GH
+
+    io = GH.Kernel.GH_DocumentIO()
+    if not io.Open(ghx_file):
+        raise Exception(f"can not open {ghx_file}")
+    doc = io.Document
+    doc.Enabled = True
+    return GH, doc
+
+
+def run(ghx_file=DEFINITION, sizes=SIZES, rounds=ROUNDS):
+    """Time every script component for all sizes, rounds times each."""
+    cells, size_slider = read_matrix(ghx_file)
+    if size_slider is None:
+        raise Exception(f"no {SIZE_COMPONENT}.{SIZE_INPUT} slider in {ghx_file}")
+
+    GH, doc = _load_document(ghx_file)
+    try:
+        slider = doc.FindObject(Guid(size_slider), True)
+        components = {k: doc.FindObject(Guid(k), True) for k in cells}
+
+        results = {k: {} for k in cells}
+        for size in sizes:
+            maximum = max(size, int(slider.Slider.Maximum))
+            slider.Slider.Maximum = System.Decimal(maximum)
+            slider.SetSliderValue(System.Decimal(size))
+
+            times = {k: [] for k in cells}
+            for _ in range(rounds):
+                doc.NewSolution(True, GH.Kernel.GH_SolutionMode.Silent)
+                for k, component in components.items():
+                    times[k].append(component.ProcessorTime.TotalMilliseconds)
+
+            for k, t in times.items():
+                results[k][str(size)] = {
+                    "rounds": t,
+                    "mean": mean(t),
+                    "dev": pstdev(t),
+                }
+                print(
+                    "{language:>10} {access:>5} {type_hint:>6} {group}: ".format(**cells[k])
+                    + f"{size} perf({rounds}, {mean(t):.0f}ms, {pstdev(t):.0f}ms)"
+                )
+    finally:
+        doc.Enabled = False
+        doc.Dispose()
+
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "rhino": str(RhinoApp.Version),
+        "build_date": RhinoApp.BuildDate.ToString("yyyy-MM-dd"),
+        "definition": op.basename(ghx_file),
+        "rounds": rounds,
+        "components": [
+            dict(cells[k], instance=k, sizes=results[k]) for k in cells
+        ],
+    }
+
+
+def append_history(record, history_file=HISTORY):
+    """Add the run record to the JSON list in history_file."""
+    history = []
+    if op.exists(history_file):
+        with open(history_file, "r") as f:
+            history = json.load(f)
+    history.append(record)
+
+    temp_file = history_file + ".tmp"
+    with open(temp_file, "w") as f:
+        json.dump(history, f, indent=2)
+    os.replace(temp_file, history_file)
+
+
+if __name__ == "__main__":
+    append_history(run())
+    print(f"history: {HISTORY}")
@@ -0,0 +1,96 @@
+"""Display conduit that previews curves for interactive scripts.
+
+Curves are converted for display once, when they are set, and the bounding
+box is the union of the boxes of the converted curves. Lines, polylines
+and polyline curves are drawn together with one DrawLines call, other
+curves with one DrawCurve each. Single curves can be replaced without
+converting the others again.
+"""
+import Rhino
+import Rhino.Geometry as rg
+
+from System import Array
+from System.Collections.Generic import List
+
+
+class _PreviewItem:
+    # display data of one curve: its segments if it is a polyline,
+    # otherwise the curve itself
+    __slots__ = ("lines", "curve", "bbox")
+
+    def __init__(self, geometry):
+        self.lines = None
+        self.curve = None
+        if isinstance(geometry, rg.Line):
+            self.lines = Array[rg.Line]([geometry])
+        elif isinstance(geometry, rg.Polyline):
+            self.lines = geometry.GetSegments()
+        elif isinstance(geometry, rg.LineCurve):
+            self.lines = Array[rg.Line]([geometry.Line])
+        elif isinstance(geometry, rg.PolylineCurve):
+            self.lines = geometry.ToPolyline().GetSegments()
+        else:
+            self.curve = geometry.ToNurbsCurve()
+
+        if self.curve is not None:
+            self.bbox = self.curve.GetBoundingBox(False)
+        else:
+            self.bbox = rg.BoundingBox.Empty
+            for line in self.lines:
+                self.bbox.Union(line.BoundingBox)
+
+
+class CurvesPreviewConduit(Rhino.Display.DisplayConduit):
+    def __init__(self, crvs=None, color=None, thickness=3):
+        super().__init__()
+        self.draw_color = color or Rhino.ApplicationSettings.AppearanceSettings.TrackingColor
+        self.thickness = thickness
+        self._items = []
+        self._lines = None
+        self._curves = None
+        self.bbox = rg.BoundingBox.Empty
+        if crvs:
+            self.SetCurves(crvs)
+
+    def __repr__(self):
+        return "<CurvesPreviewConduit Curves:{}>".format(len(self._items))
+
+    def SetCurves(self, crvs):
+        """Replace all previewed curves"""
+        self._items = [_PreviewItem(crv) for crv in crvs]
+        self._Changed()
+
+    def UpdateCurves(self, crvs):
+        """Replace some curves, crvs maps curve index to its new curve"""
+        for idx, crv in crvs.items():
+            self._items[idx] = _PreviewItem(crv)
+        self._Changed()
+
+    def _Changed(self):
+        self.bbox = rg.BoundingBox.Empty
+        for item in self._items:
+            self.bbox.Union(item.bbox)
+        # draw lists are rebuilt on the next draw
+        self._lines = None
+        self._curves = None
+
+    def _BuildDrawLists(self):
+        self._lines = List[rg.Line]()
+        self._curves = []
+        for item in self._items:
+            if item.lines is not None:
+                self._lines.AddRange(item.lines)
+            else:
+                self._curves.append(item.curve)
+
+    def CalculateBoundingBox(self, e):
+        e.IncludeBoundingBox(self.bbox)
+
+    # DrawOverlay override
+    def DrawOverlay(self, e):
+        if self._lines is None:
+            self._BuildDrawLists()
+        if self._lines.Count:
+            e.Display.DrawLines(self._lines, self.draw_color, self.thickness)
+        for crv in self._curves:
+            e.Display.DrawCurve(crv, self.draw_color, self.thickness)
@@ -1,88 +1,99 @@
 #! python 3
+# r: numpy
 import rhinoscriptsyntax as rs
 import scriptcontext as sc
 import Rhino
-import random
+import numpy as np
+import sys
+import os.path as op
 
 from System.Collections.Generic import List
 
-class DrawCurvesConduit(Rhino.Display.DisplayConduit):
-    # class members
-    
-    # class constructor
-    def __init__(self, crvs):
-        super().__init__()
-        self.crvs = [crv.ToNurbsCurve() for crv in crvs]
-        self.draw_color = Rhino.ApplicationSettings.AppearanceSettings.TrackingColor
-        self.bbox = Rhino.Geometry.BoundingBox(0, 0, 0, 0, 0, 0)
-        for crv in crvs:
-            self.bbox.Union(crv.ToNurbsCurve().GetBoundingBox(True))
-        
-    def CalculateBoundingBox(self, e):
-        e.IncludeBoundingBox(self.bbox)
-        
-    # DrawOverlay override
-    def DrawOverlay(self, e):
-        for crv in self.crvs:
-            e.Display.DrawCurve(crv, self.draw_color, 3)
+sys.path.append(op.dirname(__file__))
+from previewconduit import CurvesPreviewConduit
 
-
-def CalculateCurves(ids, space, scale, crvType, planar, noiseType):
-    
-    size = scale*space*.5
-    crvList = ["Soft", "Medium", "Hard"]
-    crvs = [rs.coercecurve(id) for id in ids]
-    result = []
+class NoisyCurve:
+    # per curve cache. division points and noise directions only change
+    # with spacing, noisy points with scale and the output curve with style
     
-    def RandomizePt(pt,crv, size, noiseType, plane):
-        pass
-        coords = []
-        vecDir = crv.FrameAt(crv.ClosestPoint(pt)[1])[1].YAxis
-        pass
-        vecScale = random.uniform(-size, size)
-        vecDir *= vecScale
-        
-        targ = pt + vecDir
-        return targ
-
-    crvsOut = []
-    for crv in crvs:
+    def __init__(self, crv):
+        self.crv = crv
+        self.space = None
+        self.size = None
+        self.pts = np.empty((0, 3))
+        self.dirs = np.empty((0, 3))
+        self.newPts = []
+        self.outCrvs = {}
         
-        diag = crv.GetBoundingBox(True).Diagonal
-        pass 
-        
-        crntPlane = None
-        pars = list(crv.DivideByLength(space, True))
+    def Divide(self, space):
+        if space == self.space:
+            return
+        crv = self.crv
+        pars = list(crv.DivideByLength(space, True) or [])
         if not crv.IsClosed:
             pars.append(crv.Domain.Max)
-        pts = [crv.PointAt(par) for par in pars]
-        newPts = []
+        # the last point of closed curves is the first one again
+        if crv.IsClosed:
+            pars = pars[:-1]
+        # frames at the division parameters, no need to project the
+        # points back onto the curve
+        pts = []
+        dirs = []
+        for par in pars:
+            pt = crv.PointAt(par)
+            vecDir = crv.FrameAt(par)[1].YAxis
+            pts.append((pt.X, pt.Y, pt.Z))
+            dirs.append((vecDir.X, vecDir.Y, vecDir.Z))
+        self.pts = np.array(pts, dtype=np.float64).reshape(-1, 3)
+        self.dirs = np.array(dirs, dtype=np.float64).reshape(-1, 3)
+        self.space = space
+        self.size = None
         
-        if crv.IsPlanar():
-            if planar:
-                rc, crntPlane = crv.TryGetPlane()
-            else:
-                crntPlane = rs.ViewCPlane()
-        if not crv.IsClosed:
-            for pt in pts:
-                newPts.append(RandomizePt(pt, crv, size, noiseType, crntPlane))
-            #newPtsappend(pts[len(pts)-1])
-        else:
-            for n in range(len(pts)-1):
-                newPts.append(RandomizePt(pts[n],crv, size, noiseType, crntPlane))
-                
-            #newPts.append(pts[len(pts)]-1)
+    def SetNoise(self, offsets, size):
+        newPts = [
+            Rhino.Geometry.Point3d(x, y, z)
+            for x, y, z in (self.pts + self.dirs * offsets[:, None]).tolist()
+        ]
+        if self.crv.IsClosed and newPts:
             newPts.append(newPts[0])
-        if crvType == 0:
-            geometry = List[Rhino.Geometry.Point3d]()
-            for pt in newPts:
-                geometry.Add(Rhino.Geometry.Point3d(pt))
-            temp = Rhino.Geometry.Curve.CreateInterpolatedCurve(geometry, 3, Rhino.Geometry.CurveKnotStyle.Uniform)
-        else:
-            temp = Rhino.Geometry.Polyline(newPts)
-        crvsOut.append(temp)
-    return crvsOut
-    pass
+        self.newPts = newPts
+        self.size = size
+        self.outCrvs = {}
+        
+    def GetCurve(self, crvType):
+        if crvType not in self.outCrvs:
+            if crvType == 0:
+                geometry = List[Rhino.Geometry.Point3d](self.newPts)
+                temp = Rhino.Geometry.Curve.CreateInterpolatedCurve(geometry, 3, Rhino.Geometry.CurveKnotStyle.Uniform)
+            else:
+                temp = Rhino.Geometry.Polyline(self.newPts)
+            self.outCrvs[crvType] = temp
+        return self.outCrvs[crvType]
+
+
+def NoisifyAll(noisyCrvs, size, seed):
+    # draw the offsets of all curves that need new noise in one call. the
+    # generator starts from the seed every time, so the same spacing,
+    # scale and seed always give the same curves
+    stale = [crv for crv in noisyCrvs if crv.size != size]
+    if not stale:
+        return
+    counts = [len(crv.pts) for crv in stale]
+    rng = np.random.default_rng(seed)
+    offsets = rng.uniform(-size, size, sum(counts))
+    start = 0
+    for crv, count in zip(stale, counts):
+        crv.SetNoise(offsets[start:start+count], size)
+        start += count
+
+
+def CalculateCurves(noisyCrvs, space, scale, crvType, seed):
+    
+    size = scale*space*.5
+    for noisyCrv in noisyCrvs:
+        noisyCrv.Divide(space)
+    NoisifyAll(noisyCrvs, size, seed)
+    return [noisyCrv.GetCurve(crvType) for noisyCrv in noisyCrvs]
 
 def NoisifyCurves():
     
@@ -91,6 +102,9 @@ def NoisifyCurves():
     
     rs.UnselectAllObjects()
     
+    noisyCrvs = [NoisyCurve(rs.coercecurve(id)) for id in ids]
+    conduit = CurvesPreviewConduit()
+    
     while True:
         space=1.0
         scale = 3
@@ -98,6 +112,7 @@ def NoisifyCurves():
         planar=True
         noiseType = 0
         delIn = False
+        seed = 1
         
         
         if "NOISE_SPACE"in sc.sticky :
@@ -119,12 +134,15 @@ def NoisifyCurves():
         if "NOISE_DELETEINPUT"in sc.sticky:
             delIn = sc.sticky["NOISE_DELETEINPUT"]
             
+        if "NOISE_SEED"in sc.sticky:
+            seed = sc.sticky["NOISE_SEED"]
+            
             
-        crvs = CalculateCurves(ids, space, scale, crvType, planar, noiseType)
+        crvs = CalculateCurves(noisyCrvs, space, scale, crvType, seed)
         if not crvs: return
     #        for crv in crvs:
     #            sc.doc.Objects.AddPolyline(crv)
-        conduit = DrawCurvesConduit(crvs)
+        conduit.SetCurves(crvs)
         conduit.Enabled = True
         sc.doc.Views.Redraw()
             
@@ -141,6 +159,7 @@ def NoisifyCurves():
         opType = Rhino.Input.Custom.OptionToggle(bool(noiseType), "3D", "2D")
         opPlanar = Rhino.Input.Custom.OptionToggle(planar, "No", "Yes")
         opDel = Rhino.Input.Custom.OptionToggle(delIn, "No", "Yes")
+        opSeed = Rhino.Input.Custom.OptionInteger(seed, 0, 2147483647)
         
         go.AddOptionDouble("Spacing",opSpace)
         go.AddOptionDouble("Scale",opScale)
@@ -148,6 +167,7 @@ def NoisifyCurves():
         go.AddOptionToggle("InCurvePlane", opPlanar)
         go.AddOptionToggle("NoiseType", opType)
         go.AddOptionToggle("DeleteInput", opDel)
+        go.AddOptionInteger("Seed", opSeed)
     
         ret = go.Get()
         
@@ -179,6 +199,11 @@ def NoisifyCurves():
             elif idx == 6:
                 delIn = opDel.CurrentValue
                 sc.sticky["NOISE_DELETEINPUT"] = delIn
+            elif idx == 7:
+                seed = opSeed.CurrentValue
+                sc.sticky["NOISE_SEED"] = seed
+                for noisyCrv in noisyCrvs:
+                    noisyCrv.size = None
             conduit.Enabled= False
             continue
         elif ret == Rhino.Input.GetResult.Nothing:
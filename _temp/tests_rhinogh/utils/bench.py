@@ -0,0 +1,92 @@
+"""Per-round timing and peak memory capture for perf definitions.
+
+Rounds are kept per label for as long as this module stays loaded, so
+re-solving a definition adds rounds. Reports use the same
+perf(rounds, mean, deviation) format as the perf definition file names.
+
+Tracing slows allocations down, so a round either times the block or
+captures its peak memory, never both. Time the rounds as usual, then set
+MEASURE_MEMORY and solve once more to get the peak of every block:
+
+    from utils import bench
+    bench.MEASURE_MEMORY = True
+
+Peak memory is what tracemalloc sees, which is python allocations only.
+Memory allocated by .NET (e.g. Point3d arrays) is not included.
+"""
+import time
+import tracemalloc
+from contextlib import contextmanager
+from statistics import mean, pstdev
+
+
+# default of measure(memory=...), True makes the next solves memory passes
+# instead of timed rounds
+MEASURE_MEMORY = False
+
+_ROUNDS = {}
+_PEAKS = {}
+
+
+@contextmanager
+def measure(label, memory=None):
+    """Time the block as one round, or with memory=True capture its peak
+    python memory instead. memory=None uses MEASURE_MEMORY.
+
+    The peak is only captured if this call starts tracing. A memory pass
+    nested in another one would report the peak of the outer block, so it
+    is not recorded and the outer trace is left running.
+    """
+    if memory is None:
+        memory = MEASURE_MEMORY
+    if not memory:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _ROUNDS.setdefault(label, []).append(elapsed)
+            print(report(label))
+        return
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            _PEAKS.setdefault(label, []).append(peak)
+        print(report(label))
+
+
+def report(label):
+    rounds = _ROUNDS.get(label, [])
+    peaks = _PEAKS.get(label, [])
+    if not rounds and not peaks:
+        return "{}: no rounds".format(label)
+
+    parts = [label + ":"]
+    if rounds:
+        times = [x * 1000.0 for x in rounds]
+        parts.append(
+            "perf({}, {:.0f}ms, {:.0f}ms) last {:.1f}ms".format(
+                len(times), mean(times), pstdev(times), times[-1]
+            )
+        )
+    else:
+        parts.append("no timed rounds")
+    if peaks:
+        parts.append("peak {:.0f}KiB".format(max(peaks) / 1024.0))
+    return " ".join(parts)
+
+
+def reset(label=None):
+    if label is None:
+        _ROUNDS.clear()
+        _PEAKS.clear()
+    else:
+        _ROUNDS.pop(label, None)
+        _PEAKS.pop(label, None)
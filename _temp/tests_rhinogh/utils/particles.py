@@ -0,0 +1,113 @@
+"""Structure-of-arrays particle system.
+
+Positions and velocities of all particles are kept in (N, 3) float64
+arrays and updated together. Every step is appended to a preallocated
+history buffer that doubles in size when full, and polylines only get
+the points added since they were last published.
+"""
+import numpy as np
+
+import Rhino.Geometry as rg
+
+from . import points
+
+
+def _unitize(vectors):
+    # same as Vector3d.Unitize, zero vectors are left as they are
+    lengths = np.linalg.norm(vectors, axis=1)
+    nonzero = lengths > 0.0
+    vectors[nonzero] /= lengths[nonzero, None]
+    return vectors
+
+
+class ParticleSystem:
+    def __init__(
+        self,
+        count=1,
+        position=(0.0, 0.0, 0.0),
+        velocity=(0.1, 0.1, 0.0),
+        capacity=64,
+        seed=None,
+    ):
+        self.positions = np.tile(np.asarray(position, dtype=np.float64), (count, 1))
+        self.velocities = np.tile(np.asarray(velocity, dtype=np.float64), (count, 1))
+        self._rng = np.random.default_rng(seed)
+
+        # history is (steps, particles, 3), first step is the start position
+        self._history = np.empty((max(capacity, 1), count, 3), dtype=np.float64)
+        self._history[0] = self.positions
+        self._steps = 1
+
+        self._polylines = [rg.Polyline() for _ in range(count)]
+        self._published = 0
+
+    def __repr__(self):
+        return "<ParticleSystem Particles:{} Steps:{}>".format(
+            self.count, self._steps
+        )
+
+    @property
+    def count(self):
+        return len(self.positions)
+
+    @property
+    def steps(self):
+        return self._steps
+
+    @property
+    def history(self):
+        """(steps, particles, 3) view of all positions so far."""
+        return self._history[: self._steps]
+
+    def _append_history(self):
+        if self._steps == len(self._history):
+            # grow by doubling so appending stays O(1) amortized
+            grown = np.empty(
+                (2 * len(self._history),) + self._history.shape[1:],
+                dtype=np.float64,
+            )
+            grown[: self._steps] = self._history[: self._steps]
+            self._history = grown
+        self._history[self._steps] = self.positions
+        self._steps += 1
+
+    def update(self, attractor=None, attractor_strength=0.0, max_turn=0.2):
+        """Move all particles one step.
+
+        Same as the wandering particle definition: steer towards the
+        attractor if there is one, keeping the speed, then turn by a random
+        angle around the Z axis.
+        """
+        speeds = np.linalg.norm(self.velocities, axis=1)[:, None]
+        if attractor is not None:
+            to_attractor = np.asarray(attractor, dtype=np.float64) - self.positions
+            to_attractor = _unitize(to_attractor) * speeds
+            velocities = (
+                attractor_strength * to_attractor
+                + (1.0 - attractor_strength) * self.velocities
+            )
+            self.velocities = _unitize(velocities) * speeds
+
+        angles = self._rng.uniform(-max_turn, max_turn, self.count)
+        cos_a = np.cos(angles)
+        sin_a = np.sin(angles)
+        vel_x = self.velocities[:, 0].copy()
+        vel_y = self.velocities[:, 1]
+        self.velocities[:, 0] = vel_x * cos_a - vel_y * sin_a
+        self.velocities[:, 1] = vel_x * sin_a + vel_y * cos_a
+
+        self.positions += self.velocities
+        self._append_history()
+
+    def polylines(self):
+        """Polyline of each particle history.
+
+        The same Polyline objects are returned every time, with only the
+        new steps appended to them.
+        """
+        if self._published < self._steps:
+            new_steps = self._history[self._published : self._steps]
+            for idx, polyline in enumerate(self._polylines):
+                polyline.AddRange(points.to_point3d_array(new_steps[:, idx]))
+            self._published = self._steps
+        return self._polylines
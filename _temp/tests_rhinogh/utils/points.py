@@ -0,0 +1,80 @@
+"""Bulk conversion between Point3d collections and numpy arrays.
+
+Point3d is a sequential struct of three doubles, so a pinned Point3d[] has
+the same memory layout as a C-contiguous (N, 3) float64 array. Points are
+copied in and out with one memmove instead of one interop call per point.
+Vector3d has the same layout and is converted the same way.
+"""
+import ctypes
+
+import numpy as np
+
+import System
+from System.Collections.Generic import List
+from System.Runtime.InteropServices import GCHandle, GCHandleType
+
+import Rhino.Geometry as rg
+from Rhino.Collections import Point3dList
+
+
+def as_coords(data):
+    """(N, 3) contiguous float64 view or copy of data.
+
+    data can be a numpy array, a nested sequence or any object that
+    exposes a buffer of doubles (memoryview, array.array, bytes, ...).
+    """
+    if isinstance(data, (bytes, bytearray)):
+        data = np.frombuffer(data, dtype=np.float64)
+    coords = np.ascontiguousarray(data, dtype=np.float64)
+    return coords.reshape(-1, 3)
+
+
+def _copy_pinned(points, address, nbytes, into_points):
+    handle = GCHandle.Alloc(points, GCHandleType.Pinned)
+    try:
+        points_address = handle.AddrOfPinnedObject().ToInt64()
+        if into_points:
+            ctypes.memmove(points_address, address, nbytes)
+        else:
+            ctypes.memmove(address, points_address, nbytes)
+    finally:
+        handle.Free()
+
+
+def to_point3d_array(data, struct_type=rg.Point3d):
+    """Point3d[] from (N, 3) coordinates."""
+    coords = as_coords(data)
+    points = System.Array.CreateInstance(struct_type, len(coords))
+    _copy_pinned(points, coords.ctypes.data, coords.nbytes, into_points=True)
+    return points
+
+
+def to_vector3d_array(data):
+    """Vector3d[] from (N, 3) coordinates."""
+    return to_point3d_array(data, struct_type=rg.Vector3d)
+
+
+def to_point3d_list(data):
+    """List[Point3d] from (N, 3) coordinates."""
+    return List[rg.Point3d](to_point3d_array(data))
+
+
+def to_point3dlist(data):
+    """Rhino.Collections.Point3dList from (N, 3) coordinates."""
+    return Point3dList(to_point3d_array(data))
+
+
+def to_coords(points, struct_type=rg.Point3d):
+    """(N, 3) float64 array from Point3d[], List[Point3d], Point3dList or
+    a python list of Point3d. Use struct_type=Vector3d for vectors."""
+    if isinstance(points, System.Array):
+        point_array = points
+    elif hasattr(points, "ToArray"):
+        point_array = points.ToArray()
+    else:
+        # converted to an array by the runtime, not point by point in python
+        point_array = System.Array[struct_type](points)
+
+    coords = np.empty((len(point_array), 3), dtype=np.float64)
+    _copy_pinned(point_array, coords.ctypes.data, coords.nbytes, into_points=False)
+    return coords
@@ -0,0 +1,134 @@
+"""Uniform grid neighbor search over contiguous coordinate arrays.
+
+Points are kept in an (N, 3) float64 array. The grid buckets points into
+cubic cells of cell_size, so all neighbors within cell_size of a point are
+in its own cell or in one of the 26 cells around it.
+"""
+import numpy as np
+
+
+# own cell and the 13 neighbor cells that come after it, so every pair of
+# cells is visited once
+_HALF_NEIGHBORS = [
+    (dx, dy, dz)
+    for dx in (-1, 0, 1)
+    for dy in (-1, 0, 1)
+    for dz in (-1, 0, 1)
+    if (dx, dy, dz) >= (0, 0, 0)
+]
+
+
+class SpatialGrid:
+    def __init__(self, coords, cell_size=2.0):
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64)
+        self.cell_size = float(cell_size)
+        self.update()
+
+    def __repr__(self):
+        return "<SpatialGrid Points:{} CellSize:{} Cells:{}>".format(
+            len(self.coords), self.cell_size, len(self._cell_keys)
+        )
+
+    def update(self):
+        """Rebuild the cells after coords changed in place."""
+        cells = np.floor(self.coords / self.cell_size).astype(np.int64)
+        # pad by one cell on each side so neighbor keys never wrap around
+        cells -= cells.min(axis=0) - 1 if len(cells) else 0
+        dims = cells.max(axis=0) + 2 if len(cells) else np.ones(3, np.int64)
+        self._strides = np.array([dims[1] * dims[2], dims[2], 1], dtype=np.int64)
+
+        keys = cells @ self._strides
+        self._order = np.argsort(keys, kind="stable")
+        self._cell_keys, self._cell_starts, self._cell_counts = np.unique(
+            keys[self._order], return_index=True, return_counts=True
+        )
+
+    def candidate_pairs(self):
+        """Index pairs (i, j) of points in the same or in adjacent cells.
+
+        Every pair is listed once and a point is never paired with itself.
+        """
+        pairs_i = []
+        pairs_j = []
+        for offset in _HALF_NEIGHBORS:
+            # find the occupied neighbor cell of every occupied cell
+            nb_keys = self._cell_keys + np.dot(offset, self._strides)
+            nb_cells = np.searchsorted(self._cell_keys, nb_keys)
+            nb_cells = np.minimum(nb_cells, len(self._cell_keys) - 1)
+            cells = np.nonzero(self._cell_keys[nb_cells] == nb_keys)[0]
+            nb_cells = nb_cells[cells]
+
+            # every point of a cell against every point of its neighbor
+            counts = self._cell_counts[cells]
+            nb_counts = self._cell_counts[nb_cells]
+            sizes = counts * nb_counts
+            pair_cells = np.repeat(np.arange(len(cells)), sizes)
+            local = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            local_i = local // nb_counts[pair_cells]
+            local_j = local % nb_counts[pair_cells]
+            if offset == (0, 0, 0):
+                # same cell, keep i < j only
+                keep = local_i < local_j
+                pair_cells, local_i, local_j = (
+                    pair_cells[keep],
+                    local_i[keep],
+                    local_j[keep],
+                )
+
+            pairs_i.append(self._order[self._cell_starts[cells][pair_cells] + local_i])
+            pairs_j.append(
+                self._order[self._cell_starts[nb_cells][pair_cells] + local_j]
+            )
+
+        if not pairs_i:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+    def pairs_within(self, radius=None):
+        """Index pairs closer than radius, and their squared distances.
+
+        radius defaults to cell_size and can not be larger than it.
+        """
+        radius = self.cell_size if radius is None else radius
+        if radius > self.cell_size:
+            raise ValueError("radius can not be larger than cell size")
+
+        pairs_i, pairs_j = self.candidate_pairs()
+        deltas = self.coords[pairs_i] - self.coords[pairs_j]
+        dist_sq = np.einsum("ij,ij->i", deltas, deltas)
+        keep = dist_sq <= radius * radius
+        return pairs_i[keep], pairs_j[keep], dist_sq[keep]
+
+
+def relax(grid, radius=2.0):
+    """Push apart circles closer than radius, one step, in place.
+
+    Same step as the all-pairs loop of the circle packing definition: each
+    overlapping pair is moved apart by half the overlap, and each point
+    moves by the average of its pushes. Coincident points have no push
+    direction and are skipped.
+    """
+    grid.update()
+    coords = grid.coords
+    pairs_i, pairs_j, dist_sq = grid.pairs_within(radius)
+    apart = dist_sq > 0.0
+    pairs_i, pairs_j, dist_sq = pairs_i[apart], pairs_j[apart], dist_sq[apart]
+
+    dist = np.sqrt(dist_sq)
+    pushes = (coords[pairs_i] - coords[pairs_j]) * ((radius - dist) * 0.5 / dist)[
+        :, None
+    ]
+
+    count = len(coords)
+    counts = np.bincount(pairs_i, minlength=count) + np.bincount(
+        pairs_j, minlength=count
+    )
+    moves = np.empty_like(coords)
+    for axis in range(3):
+        moves[:, axis] = np.bincount(
+            pairs_i, weights=pushes[:, axis], minlength=count
+        ) - np.bincount(pairs_j, weights=pushes[:, axis], minlength=count)
+
+    moved = counts > 0
+    coords[moved] += moves[moved] / counts[moved, None]
+    return coords
@@ -0,0 +1,76 @@
+"""Bulk point and vector arithmetic.
+
+Each operation converts its inputs to arrays once, does the arithmetic in
+numpy and converts the result back once, instead of dispatching a .NET
+operator overload per element. Operands can be a single Point3d/Vector3d,
+a collection of them or an (N, 3) array. Array inputs give array results,
+everything else gives Point3d[].
+"""
+import numpy as np
+
+import Rhino.Geometry as rg
+
+from . import points as _points
+
+
+_POINT_TYPES = (rg.Point3d, rg.Vector3d, rg.Point3f, rg.Vector3f)
+
+
+def _operand(value):
+    if isinstance(value, np.ndarray):
+        return _points.as_coords(value)
+    # single point or vector. Point3dList and Polyline have X, Y and Z
+    # too, so the struct types are tested instead
+    if isinstance(value, _POINT_TYPES):
+        return np.array([[value.X, value.Y, value.Z]], dtype=np.float64)
+    if isinstance(value, (tuple, list)) and len(value) == 3:
+        if all(isinstance(x, (int, float)) for x in value):
+            return np.array([value], dtype=np.float64)
+    # python lists are converted to an array of their element type first.
+    # Vector3d only converts to Point3d explicitly, so vectors are copied
+    # as a Vector3d[], which has the same layout
+    if isinstance(value, (tuple, list)) and value and isinstance(value[0], rg.Vector3d):
+        return _points.to_coords(value, struct_type=rg.Vector3d)
+    return _points.to_coords(value)
+
+
+def _result(coords, like):
+    if isinstance(like, np.ndarray):
+        return coords
+    return _points.to_point3d_array(coords)
+
+
+def add(points, vectors):
+    """points + vectors, vectors can be one vector or one per point."""
+    return _result(_operand(points) + _operand(vectors), points)
+
+
+def subtract(points, vectors):
+    """points - vectors, vectors can be one vector or one per point."""
+    return _result(_operand(points) - _operand(vectors), points)
+
+
+def scale(points, factor, origin=(0.0, 0.0, 0.0)):
+    """Scale points about origin. factor is a number or one per point."""
+    coords = _operand(points)
+    origin = _operand(origin)
+    factor = np.asarray(factor, dtype=np.float64)
+    if factor.ndim == 1:
+        factor = factor[:, None]
+    return _result((coords - origin) * factor + origin, points)
+
+
+def transform(points, xform):
+    """Apply a Rhino Transform to all points, same as Point3d.Transform."""
+    matrix = np.array(
+        [[xform[row, col] for col in range(4)] for row in range(4)],
+        dtype=np.float64,
+    )
+    coords = _operand(points)
+    transformed = coords @ matrix[:3, :3].T + matrix[:3, 3]
+    weights = coords @ matrix[3, :3] + matrix[3, 3]
+    # RhinoCommon only divides by non-zero weights and multiplies by 0
+    # otherwise
+    nonzero = weights != 0.0
+    weights[nonzero] = 1.0 / weights[nonzero]
+    return _result(transformed * weights[:, None], points)
@@ -2,8 +2,8 @@
 # https://www.nuget.org/packages/EasingFunctions
 # https://github.com/emmauss/easing-functions
 #r "nuget: EasingFunctions, 1.0.1"
-import sys
 import System
+from System import EventHandler, Guid
 from System.Drawing import Color
 
 import Rhino
@@ -11,18 +11,75 @@ from Rhino.Input import RhinoGet
 from Rhino.Input.Custom import GetPoint, OptionDouble
 from Rhino.DocObjects import ObjectType
 from Rhino.Commands import Result
-from Rhino.Geometry import Point3d, Ray3d, Circle, Plane, Transform, Line
+from Rhino.Geometry import Point3d, Vector3d, Ray3d, Circle, Plane, Transform, Line, RTree, RTreeEventArgs, Sphere, Mesh, MeshType
+from Rhino.Geometry.Intersect import Intersection
 
 from Eto.Forms import Keyboard, Keys
 
 from Easing import Quartic, Vector
 
+# same as ExtrusionIndex in 05_Libraries/PaintHeights_Lib.py. this command
+# is a single script run from the editor, the shared BrushTools library is
+# C# and PaintHeights_Lib.py prompts for the brush plane when imported, so
+# the command keeps its own copy
+class ExtrusionIndex:
+    """RTree of the bounding box minimum of every extrusion in a document"""
+
+    def __init__(self, doc):
+        self._tree = RTree()
+        self.ids = []
+        self._mins = []
+        for robj in doc.Objects.FindByObjectType(ObjectType.Extrusion):
+            bbox_min = robj.Geometry.GetBoundingBox(True).Min
+            self._tree.Insert(bbox_min, len(self.ids))
+            self.ids.append(robj.Id)
+            self._mins.append(bbox_min)
+
+    def Search(self, at, radius):
+        found = []
+
+        def collect(sender, e):
+            found.append(e.Id)
+
+        self._tree.Search(Sphere(at, radius), EventHandler[RTreeEventArgs](collect))
+        return found
+
+    def Update(self, index, obj_id, bbox_min):
+        self._tree.Remove(self._mins[index], index)
+        self._tree.Insert(bbox_min, index)
+        self.ids[index] = obj_id
+        self._mins[index] = bbox_min
+
+
+class PaintSurface:
+    """Render meshes of the brush surface, joined into one mesh"""
+
+    def __init__(self, robj):
+        self.mesh = Mesh()
+        self.mesh.Append(robj.GetMeshes(MeshType.Render))
+        self.mesh.FaceNormals.ComputeFaceNormals()
+
+    def IsValid(self):
+        return self.mesh.Faces.Count > 0
+
+    def Hit(self, ray):
+        """Nearest hit point and the normal of the face hit, or None"""
+        # the mesh keeps its face tree between calls, so every cast after
+        # the first one is a tree query
+        t, faces = Intersection.MeshRay(self.mesh, ray, None)
+        if t < 0 or not faces:
+            return None
+        return ray.PointAt(t), Vector3d(self.mesh.FaceNormals[faces[0]])
+
+
 class Brush(GetPoint):
     def __init__(self, brush_surface):
         super().__init__()
         self.SetCommandPrompt("Paint")
 
         self._bsurface = brush_surface
+        self._paint_surface = None
+        self._index = None
 
         # Default values
         self._size = 68.0
@@ -72,22 +129,16 @@ class Brush(GetPoint):
             line.Flip()
             ray = Ray3d(line.From, line.Direction)
 
-            closest_on_mesh = sys.maxsize
-            head = None
-            falloff = None
-
-            for mesh in self._bsurface.GetMeshes(Rhino.Geometry.MeshType.Render):
-                t = Rhino.Geometry.Intersect.Intersection.MeshRay(mesh, ray)
-                if t >= 0:
-                    closest_on_mesh = t
-                    hit_point = ray.PointAt(t)
-                    mp = mesh.ClosestMeshPoint(hit_point, sys.maxsize)
-                    norm = mesh.NormalAt(mp)
-                    head_plane = Plane(hit_point, norm)
-                    head = Circle(head_plane, self._size)
-                    falloff = Circle(head_plane, self._falloff)
-
-            if closest_on_mesh != sys.maxsize:
+            # render meshes may not exist until the surface is drawn
+            if self._paint_surface is None or not self._paint_surface.IsValid():
+                self._paint_surface = PaintSurface(self._bsurface)
+
+            hit = self._paint_surface.Hit(ray)
+            if hit:
+                hit_point, norm = hit
+                head_plane = Plane(hit_point, norm)
+                head = Circle(head_plane, self._size)
+                falloff = Circle(head_plane, self._falloff)
                 e.Display.DrawCircle(head, Color.Blue, 3)
                 if self._falloff != self._size:
                     e.Display.DrawCircle(falloff, Color.LightGray, 2)
@@ -97,7 +148,15 @@ class Brush(GetPoint):
                 self.ApplyBrush(e.RhinoDoc, p, reverse)
 
     def ApplyBrush(self, doc, at, reverse):
-        for robj in doc.Objects.FindByObjectType(ObjectType.Extrusion):
+        # index is built on the first stroke and kept up to date as the
+        # brush transforms extrusions
+        if self._index is None:
+            self._index = ExtrusionIndex(doc)
+
+        for index in self._index.Search(at, self._falloff):
+            robj = doc.Objects.FindId(self._index.ids[index])
+            if robj is None or robj.IsDeleted:
+                continue
             bbox = robj.Geometry.GetBoundingBox(True)
             pp = bbox.Min
             dist = at.DistanceTo(pp)
@@ -105,7 +164,10 @@ class Brush(GetPoint):
                 height = bbox.Max.Z - bbox.Min.Z
                 value = self.ComputeValue(dist, height, reverse)
                 xform = Transform.Scale(Plane.WorldXY, 1.0, 1.0, value / height)
-                doc.Objects.Transform(robj, xform, True)
+                obj_id = doc.Objects.Transform(robj, xform, True)
+                if obj_id != Guid.Empty:
+                    bbox_min = doc.Objects.FindId(obj_id).Geometry.GetBoundingBox(True).Min
+                    self._index.Update(index, obj_id, bbox_min)
 
     def ComputeValue(self, dist, start, reverse):
         value = start
@@ -4,6 +4,7 @@
 #r "nuget: EasingFunctions, 1.0.1"
 import sys
 import System
+from System import EventHandler, Guid
 from System.Drawing import Color
 
 import Rhino
@@ -11,7 +12,7 @@ from Rhino.Input import RhinoGet
 from Rhino.Input.Custom import GetPoint, OptionDouble
 from Rhino.DocObjects import ObjectType
 from Rhino.Commands import Result
-from Rhino.Geometry import Point3d, Ray3d, Circle, Plane, Transform, Line, MeshType
+from Rhino.Geometry import Point3d, Ray3d, Circle, Plane, Transform, Line, Mesh, MeshType, RTree, RTreeEventArgs, Sphere
 
 from Eto.Forms import Keyboard, Keys
 
@@ -19,17 +20,68 @@ from Easing import Quartic, Vector
 
 from BrushTools import BaseBrush
 
+# keep in sync with ExtrusionIndex in 02_Command/PaintHeights.py, which
+# can not import it from here
+class ExtrusionIndex:
+    """RTree of the bounding box minimum of every extrusion in a document"""
+
+    def __init__(self, doc):
+        self._tree = RTree()
+        self.ids = []
+        self._mins = []
+        for robj in doc.Objects.FindByObjectType(ObjectType.Extrusion):
+            bbox_min = robj.Geometry.GetBoundingBox(True).Min
+            self._tree.Insert(bbox_min, len(self.ids))
+            self.ids.append(robj.Id)
+            self._mins.append(bbox_min)
+
+    def Search(self, at, radius):
+        found = []
+
+        def collect(sender, e):
+            found.append(e.Id)
+
+        self._tree.Search(Sphere(at, radius), EventHandler[RTreeEventArgs](collect))
+        return found
+
+    def Update(self, index, obj_id, bbox_min):
+        self._tree.Remove(self._mins[index], index)
+        self._tree.Insert(bbox_min, index)
+        self.ids[index] = obj_id
+        self._mins[index] = bbox_min
+
+
 class Brush(BaseBrush):
     def __init__(self, brush_surface):
         super().__init__()
 
         self._bsurface = brush_surface
+        self._paint_surfaces = None
+        self._index = None
 
     def GetPaintSurfaces(self):
-        return self._bsurface.GetMeshes(MeshType.Render)
+        # the base brush casts against these on every frame, so the render
+        # meshes are joined into one mesh once. they may not exist until
+        # the surface is drawn
+        if self._paint_surfaces is None:
+            meshes = self._bsurface.GetMeshes(MeshType.Render)
+            if not meshes:
+                return meshes
+            mesh = Mesh()
+            mesh.Append(meshes)
+            self._paint_surfaces = System.Array[Mesh]([mesh])
+        return self._paint_surfaces
 
     def ApplyBrush(self, doc, at, reverse):
-        for robj in doc.Objects.FindByObjectType(ObjectType.Extrusion):
+        # index is built on the first stroke and kept up to date as the
+        # brush transforms extrusions
+        if self._index is None:
+            self._index = ExtrusionIndex(doc)
+
+        for index in self._index.Search(at, self._falloff):
+            robj = doc.Objects.FindId(self._index.ids[index])
+            if robj is None or robj.IsDeleted:
+                continue
             bbox = robj.Geometry.GetBoundingBox(True)
             pp = bbox.Min
             dist = at.DistanceTo(pp)
@@ -37,7 +89,10 @@ class Brush(BaseBrush):
                 height = bbox.Max.Z - bbox.Min.Z
                 value = self.ComputeValue(dist, height, reverse)
                 xform = Transform.Scale(Plane.WorldXY, 1.0, 1.0, value / height)
-                doc.Objects.Transform(robj, xform, True)
+                obj_id = doc.Objects.Transform(robj, xform, True)
+                if obj_id != Guid.Empty:
+                    bbox_min = doc.Objects.FindId(obj_id).Geometry.GetBoundingBox(True).Min
+                    self._index.Update(index, obj_id, bbox_min)
 
 
 success, obj_ref = RhinoGet.GetOneObject("Select Brush Plane", False, filter=ObjectType.Brep | ObjectType.Mesh)
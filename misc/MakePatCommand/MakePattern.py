@@ -1,4 +1,9 @@
 #! python3
+# r: numpy
+
+import os.path as op
+import itertools
+import tempfile
 
 import System
 
@@ -12,19 +17,39 @@ import patmaker
 
 doc = R.RhinoDoc.ActiveDoc
 
+# safe-grid tables are reused across runs for tiles of the same size
+CACHE_DIR = op.join(tempfile.gettempdir(), "patmaker_cache")
 
-def make_pattern(selected, bounds, name):
-    lines = []
-    obj_table = R.RhinoDoc.ActiveDoc.Objects
+
+def iter_curves(selected):
+    # one table lookup per id that returns the geometry directly, read
+    # lazily so curves are released once their segments are converted
+    obj_table = doc.Objects
     for roid in selected:
-        curve: G.Curve = obj_table.Find(roid).Geometry
-        segments = patmaker.get_segments(curve)
-        lines += segments
-    
-    if lines:
-        hatch = patmaker.make_pattern(name, lines, bounds)
-        hatch_index = doc.HatchPatterns.Add(hatch)
-        print(hatch_index)
+        curve: G.Curve = obj_table.FindGeometry(roid)
+        if curve is not None:
+            yield curve
+
+
+def make_pattern(selected, bounds, name):
+    segments = patmaker.iter_segment_arrays(iter_curves(selected))
+    first = next(segments, None)
+    if first is None:
+        return
+
+    # no dedupe so segments are consumed as they are converted and memory
+    # stays flat. duplicate and overlapping segments still merge into the
+    # dashes of their grid, only collinear runs longer than a grid span
+    # and zero length segments are not cleaned up
+    hatch = patmaker.make_pattern(
+        name,
+        itertools.chain((first,), segments),
+        bounds,
+        dedupe=False,
+        cache_dir=CACHE_DIR,
+    )
+    hatch_index = doc.HatchPatterns.Add(hatch)
+    print(hatch_index)
 
 
 def run_make_pattern_command():
@@ -0,0 +1,268 @@
+#! python3
+"""Benchmark patmaker stages on synthetic tiles
+
+Runs make_pattern on generated line sets and reports, for each stage, the
+number of calls, the time spent and the net number of memory blocks
+allocated. Stage times are inclusive, e.g. shift calculated while safe
+angles are searched counts in both.
+
+Runs in Rhino or in any python 3. Outside Rhino, RhinoCommon types are
+replaced by the thin stand-ins below so create_pattern can be timed too.
+
+    python bench_patmaker.py --rounds 3 --lines 500 --case dense
+"""
+import sys
+import time
+import random
+import argparse
+from math import pi, cos, sin
+from types import SimpleNamespace
+from contextlib import contextmanager
+
+import patmaker
+
+
+# (owner, attribute name, label) of each timed stage
+STAGES = [
+    ("_PatternDomain", "_calculate_safe_angles", "safe angles"),
+    ("_PatternDomain", "expand", "expand"),
+    ("_PatternSafeGrid", "_calculate_shift", "shift"),
+    ("_PatternDomain", "get_grid_params", "grid params"),
+    (None, "_dedupe_lines", "dedupe"),
+    ("_FillPattern", "append_line", "append line"),
+    ("_FillPattern", "get_pat_definition", "pat definition"),
+    ("_PatDefinition", "create_pattern", "create pattern"),
+]
+
+
+# thin stand-ins for the RhinoCommon types patmaker uses
+class _Point:
+    __slots__ = ("X", "Y", "Z")
+
+    def __init__(self, x, y, z=0.0):
+        self.X, self.Y, self.Z = x, y, z
+
+
+class _Line:
+    __slots__ = ("From", "To")
+
+    def __init__(self, x0, y0, x1, y1):
+        self.From, self.To = _Point(x0, y0), _Point(x1, y1)
+
+
+class _HatchLine:
+    def __init__(self):
+        self.Angle = 0.0
+        self.BasePoint = None
+        self.Offset = None
+        self.Dashes = []
+
+    def AppendDash(self, dash):
+        self.Dashes.append(dash)
+
+
+class _HatchPattern:
+    def __init__(self):
+        self.Name = ""
+        self.FillType = None
+        self.HatchLines = []
+
+    def AddHatchLine(self, hatch_line):
+        self.HatchLines.append(hatch_line)
+
+
+STANDIN_GEOMETRY = SimpleNamespace(
+    Point2f=_Point,
+    Point2d=_Point,
+    Vector2d=_Point,
+    Line=_Line,
+)
+STANDIN_RHINO = SimpleNamespace(
+    Geometry=STANDIN_GEOMETRY,
+    DocObjects=SimpleNamespace(
+        HatchLine=_HatchLine,
+        HatchPattern=_HatchPattern,
+        HatchPatternFillType=SimpleNamespace(Lines=1),
+    ),
+)
+
+
+def _random_lines(rnd, u, v, count):
+    lines = []
+    for _ in range(count):
+        start_u, start_v = rnd.uniform(0, u), rnd.uniform(0, v)
+        end_u, end_v = rnd.uniform(0, u), rnd.uniform(0, v)
+        lines.append(_Line(start_u, start_v, end_u, end_v))
+    return lines
+
+
+def _hatch_lines(rnd, u, v, count, angles=(0.0, pi / 4.0, pi / 6.0)):
+    # parallel dashes on evenly spaced rows, a few angles
+    lines = []
+    per_angle = max(1, count // len(angles))
+    for angle in angles:
+        dir_u, dir_v = cos(angle), sin(angle)
+        for idx in range(per_angle):
+            row = (idx + 0.5) / per_angle
+            cu, cv = rnd.uniform(0, u), row * v
+            half = rnd.uniform(0.02, 0.1) * min(u, v)
+            du, dv = half * dir_u, half * dir_v
+            lines.append(_Line(cu - du, cv - dv, cu + du, cv + dv))
+    return lines
+
+
+def make_cases(seed=0, count=300):
+    """(name, domain, lines, allow_expansion) of each synthetic tile.
+
+    Dense tiles get three times count lines.
+    """
+    rnd = random.Random(seed)
+    cases = []
+    for allow_expansion in (False, True):
+        suffix = " +expansion" if allow_expansion else ""
+        cases.append(
+            (
+                "random" + suffix,
+                (1.0, 1.0),
+                _random_lines(rnd, 1.0, 1.0, count),
+                allow_expansion,
+            )
+        )
+        cases.append(
+            (
+                "dense" + suffix,
+                (1.0, 1.0),
+                _hatch_lines(rnd, 1.0, 1.0, 3 * count),
+                allow_expansion,
+            )
+        )
+        cases.append(
+            (
+                "irregular" + suffix,
+                (1.37, 0.61),
+                _random_lines(rnd, 1.37, 0.61, count),
+                allow_expansion,
+            )
+        )
+    return cases
+
+
+class StageProfile:
+    """Calls, inclusive time and net allocated blocks per stage label."""
+
+    def __init__(self):
+        self.stats = {}
+
+    def __repr__(self):
+        return "<StageProfile Stages:{}>".format(len(self.stats))
+
+    def wrap(self, label, func):
+        stats = self.stats.setdefault(label, [0, 0.0, 0])
+
+        def timed(*args, **kwargs):
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats[1] += time.perf_counter() - start
+                stats[2] += sys.getallocatedblocks() - blocks
+                stats[0] += 1
+
+        return timed
+
+    def report(self, rounds=1):
+        rows = [
+            "{:<16}{:>10}{:>12}{:>12}{:>12}".format(
+                "stage", "calls", "total ms", "call us", "blocks"
+            )
+        ]
+        for _, _, label in STAGES:
+            calls, total, blocks = self.stats.get(label, (0, 0.0, 0))
+            if not calls:
+                continue
+            rows.append(
+                "{:<16}{:>10}{:>12.2f}{:>12.2f}{:>12}".format(
+                    label,
+                    calls // rounds,
+                    total * 1000.0 / rounds,
+                    total * 1e6 / calls,
+                    blocks // rounds,
+                )
+            )
+        return "\n".join(rows)
+
+
+@contextmanager
+def profile_stages(profile):
+    """Time the STAGES of patmaker while in this context."""
+    patched = []
+    for owner_name, attr, label in STAGES:
+        owner = getattr(patmaker, owner_name) if owner_name else patmaker
+        func = owner.__dict__[attr]
+        patched.append((owner, attr, func))
+        setattr(owner, attr, profile.wrap(label, func))
+    try:
+        yield profile
+    finally:
+        for owner, attr, func in reversed(patched):
+            setattr(owner, attr, func)
+
+
+@contextmanager
+def rhino_standins():
+    """Use the stand-in RhinoCommon types if Rhino is not available."""
+    if patmaker.Rhino is not None:
+        yield
+        return
+    patmaker.Rhino, patmaker.G = STANDIN_RHINO, STANDIN_GEOMETRY
+    try:
+        yield
+    finally:
+        patmaker.Rhino = patmaker.G = None
+
+
+def run_case(domain, lines, allow_expansion, rounds=1, processes=1):
+    profile = StageProfile()
+    bounds = (STANDIN_GEOMETRY.Point2f(0.0, 0.0), STANDIN_GEOMETRY.Point2f(*domain))
+    start = time.perf_counter()
+    with rhino_standins(), profile_stages(profile):
+        for _ in range(rounds):
+            patmaker.make_pattern(
+                "bench",
+                lines,
+                bounds,
+                allow_expansion=allow_expansion,
+                processes=processes,
+            )
+    return profile, (time.perf_counter() - start) / rounds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--lines", type=int, default=300)
+    parser.add_argument(
+        "--processes", type=int, default=1, help="stages in workers are not timed"
+    )
+    parser.add_argument("--case", default="", help="only cases containing this")
+    args = parser.parse_args(argv)
+
+    for name, domain, lines, allow_expansion in make_cases(args.seed, args.lines):
+        if args.case not in name:
+            continue
+        profile, elapsed = run_case(
+            domain, lines, allow_expansion, args.rounds, args.processes
+        )
+        print(
+            "{} U:{} V:{} Lines:{} {:.1f}ms".format(
+                name, domain[0], domain[1], len(lines), elapsed * 1000.0
+            )
+        )
+        print(profile.report(args.rounds))
+        print()
+
+
+if __name__ == "__main__":
+    main()
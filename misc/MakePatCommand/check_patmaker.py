@@ -0,0 +1,422 @@
+#! python3
+"""Check patmaker numerics against their reference implementations
+
+Each check runs an optimized path of patmaker next to a plain version of
+what it replaced and reports the cases that disagree:
+
+    shift        closed form lattice step against the point scan
+    safe grids   batched and incremental tile search against a full scan,
+                 through expansions
+    grid params  bisected nearest grid against min() over all grids
+    dedupe       report counts of a known line set
+    grids        merged collinear segments against the whole line
+    pat          fill grids written to .pat text and read back
+    streaming    segment arrays and generators against a list of lines
+
+Runs in Rhino or in any python 3, see bench_patmaker for the stand-ins.
+Exits with 1 if any check fails.
+
+    python check_patmaker.py --tiles 44 --expansions 2
+"""
+import sys
+import io
+import random
+import argparse
+from math import pi, isclose
+
+import patmaker
+import bench_patmaker as bench
+
+
+DOMAINS = [(1.0, 1.0), (1.0, 0.5), (1.37, 0.61), (3.0, 7.0), (0.25, 1.75)]
+
+
+def _scan_shift(safe_grid):
+    # point scan of _PatternSafeGrid.shift before the lattice step
+    P = patmaker._PatternPoint
+    if safe_grid._angle == 0.0:
+        return 0
+    if safe_grid._u_tiles == safe_grid._v_tiles == 1:
+        return abs(safe_grid._domain_u * patmaker.cos(safe_grid._angle))
+
+    offset = safe_grid.offset
+    offset_vector = P(
+        abs(offset * patmaker.sin(safe_grid._angle)),
+        -abs(offset * patmaker.cos(safe_grid._angle)),
+    )
+    axis_end = P(
+        safe_grid._domain_u * safe_grid._u_tiles,
+        safe_grid._domain_v * safe_grid._v_tiles,
+    )
+    offset_axis = patmaker._PatternLine(
+        P(0, 0) + offset_vector, axis_end + offset_vector
+    )
+    for u_mult in range(safe_grid._u_tiles):
+        for v_mult in range(safe_grid._v_tiles):
+            grid_point = P(
+                safe_grid._domain_u * u_mult, safe_grid._domain_v * v_mult
+            )
+            if offset_axis.point_on_line(grid_point):
+                return offset_axis.start_point.distance_to(grid_point)
+    return 0
+
+
+def _scan_tiles(pat_domain, target_domain):
+    # full tile scan of _PatternDomain before batching and incremental
+    # expansion, in the order it visited the tiles
+    bounds = pat_domain._bounds
+    diag_angle = pat_domain.diagonal.angle
+    processed_ratios = {1.0}
+    tiles = []
+    u_mult = 1
+    while bounds.u * u_mult <= target_domain / 2.0:
+        v_mult = 1
+        while bounds.v * v_mult <= target_domain / 2.0:
+            ratio = round(v_mult / float(u_mult), patmaker.RATIO_RESOLUTION)
+            if ratio not in processed_ratios:
+                grid1 = patmaker._PatternSafeGrid(bounds, diag_angle, u_mult, v_mult)
+                grid2 = patmaker._PatternSafeGrid(
+                    bounds, diag_angle, u_mult, v_mult, flipped=True
+                )
+                if grid1.is_valid() and grid2.is_valid():
+                    tiles.append((u_mult, v_mult))
+                    processed_ratios.add(ratio)
+            v_mult += 1
+        u_mult += 1
+    return tiles
+
+
+def _domain(domain, expandable=True):
+    return patmaker._PatternDomain(0.0, 0.0, domain[0], domain[1], expandable)
+
+
+def check_shift(args):
+    """closed form shift equals the point scan"""
+    failed = []
+    checked = 0
+    for domain in DOMAINS:
+        pat_domain = _domain(domain)
+        for u_mult in range(1, args.tiles + 1):
+            for v_mult in range(1, args.tiles + 1):
+                for flipped in (False, True):
+                    safe_grid = patmaker._PatternSafeGrid(
+                        pat_domain._bounds,
+                        pat_domain.diagonal.angle,
+                        u_mult,
+                        v_mult,
+                        flipped=flipped,
+                    )
+                    checked += 1
+                    if safe_grid.shift != _scan_shift(safe_grid):
+                        failed.append((domain, u_mult, v_mult, flipped))
+    return checked, failed
+
+
+def check_safe_grids(args):
+    """batched, scalar and scanned safe grids are the same"""
+    failed = []
+    checked = 0
+    for domain in DOMAINS:
+        batched = _domain(domain)
+        numpy, patmaker.np = patmaker.np, None
+        try:
+            scalar = _domain(domain)
+        finally:
+            patmaker.np = numpy
+
+        for expansion in range(args.expansions + 1):
+            if expansion:
+                batched.expand()
+                numpy, patmaker.np = patmaker.np, None
+                try:
+                    scalar.expand()
+                finally:
+                    patmaker.np = numpy
+            scanned = _scan_tiles(batched, batched._target_domain)
+            checked += len(scanned)
+            batched_tiles = [tuple(x) for x in batched._tiles]
+            scalar_tiles = [tuple(x) for x in scalar._tiles]
+            if numpy is not None and batched_tiles != scalar_tiles:
+                failed.append((domain, expansion, "batched != scalar"))
+            if set(batched_tiles) != set(scanned):
+                failed.append((domain, expansion, "incremental != scan"))
+    return checked, failed
+
+
+def check_grid_params(args):
+    """bisected nearest grid is the first closest one"""
+    rnd = random.Random(args.seed)
+    failed = []
+    checked = 0
+    for domain in DOMAINS:
+        pat_domain = _domain(domain)
+        safe_angles = pat_domain.safe_angles
+        # random angles, and the grid angles themselves to hit the ties
+        angles = [rnd.uniform(0.0, pi) for _ in range(args.lines)]
+        angles.extend(x.grid_angle for x in safe_angles)
+        for angle in angles:
+            checked += 1
+            expected = min(safe_angles, key=lambda x: abs(x.grid_angle - angle))
+            if pat_domain.get_grid_params(angle) is not expected:
+                failed.append((domain, angle))
+    return checked, failed
+
+
+def check_dedupe(args):
+    """dedupe drops and merges a known line set"""
+    P, L = patmaker._PatternPoint, patmaker._PatternLine
+    pat_lines = [
+        L(P(0.0, 0.0), P(0.5, 0.0)),
+        L(P(0.5, 0.0), P(0.0, 0.0)),  # duplicate, reversed
+        L(P(0.25, 0.0), P(0.75, 0.0)),  # overlaps the first
+        L(P(0.8, 0.0), P(0.9, 0.0)),  # collinear, apart
+        L(P(0.3, 0.3), P(0.3, 0.3)),  # degenerate
+        L(P(0.0, 0.5), P(0.5, 1.0)),
+    ]
+    deduped, report = patmaker._dedupe_lines(pat_lines)
+    counts = (
+        report.input_count,
+        report.degenerate,
+        report.duplicates,
+        report.merged,
+        report.output_count,
+    )
+    expected = (6, 1, 1, 1, 3)
+    failed = [] if counts == expected else [("counts", counts, expected)]
+    return 1, failed
+
+
+def check_grids(args):
+    """segments of one line fold into the grid of the whole line"""
+    failed = []
+    checked = 0
+    for domain in DOMAINS:
+        u, v = domain
+        for start, end in [
+            ((0.0, v / 2.0), (u, v / 2.0)),
+            ((0.0, 0.0), (u, v)),
+            ((u / 2.0, 0.0), (u, v / 2.0)),
+        ]:
+            checked += 1
+            whole = _fill_pattern(domain, [start + end])
+            for pieces in (2, 3, 7):
+                step = [(e - s) / pieces for s, e in zip(start, end)]
+                lines = [
+                    (
+                        start[0] + step[0] * idx,
+                        start[1] + step[1] * idx,
+                        start[0] + step[0] * (idx + 1),
+                        start[1] + step[1] * (idx + 1),
+                    )
+                    for idx in range(pieces)
+                ]
+                random.Random(pieces).shuffle(lines)
+                split = _fill_pattern(domain, lines, dedupe=False)
+                if len(split._pattern_grids) != 1 or _segment_total(
+                    split
+                ) != _segment_total(whole):
+                    failed.append((domain, start, end, pieces))
+    return checked, failed
+
+
+def _fill_pattern(domain, lines, dedupe=True, allow_expansion=False):
+    P, L = patmaker._PatternPoint, patmaker._PatternLine
+    return patmaker._make_fill_pattern(
+        "check",
+        [L(P(su, sv), P(eu, ev)) for su, sv, eu, ev in lines],
+        ((0.0, 0.0), domain),
+        allow_expansion=allow_expansion,
+        dedupe=dedupe,
+    )
+
+
+def _segment_total(fill_pattern):
+    # pen down length of all grids
+    return round(
+        sum(
+            sum(x for x in pat_grid.segments if x > 0)
+            for pat_grid in fill_pattern._pattern_grids
+        ),
+        9,
+    )
+
+
+def check_pat(args):
+    """fill grids survive writing and reading .pat text"""
+    failed = []
+    checked = 0
+    pat_defs = []
+    for name, domain, lines, allow_expansion in bench.make_cases(
+        args.seed, args.lines
+    ):
+        fill_pattern = _fill_pattern(
+            domain,
+            [(x.From.X, x.From.Y, x.To.X, x.To.Y) for x in lines],
+            allow_expansion=allow_expansion,
+        )
+        pat_def = fill_pattern.get_pat_definition()
+        pat_def.name = name.replace(" +", "_")
+        pat_defs.append(pat_def)
+
+    written = io.StringIO()
+    patmaker.write_pat(pat_defs, written)
+    read_back = list(patmaker.read_pat(io.StringIO(written.getvalue())))
+    if len(read_back) != len(pat_defs):
+        failed.append(("patterns", len(read_back), len(pat_defs)))
+    for pat_def, read_def in zip(pat_defs, read_back):
+        checked += 1
+        same = read_def.name == pat_def.name and len(read_def.fill_grids) == len(
+            pat_def.fill_grids
+        )
+        if not same or not all(
+            _same_fill_grid(x, y)
+            for x, y in zip(pat_def.fill_grids, read_def.fill_grids)
+        ):
+            failed.append(pat_def.name)
+    return checked, failed
+
+
+def _same_fill_grid(fill_grid, read_grid):
+    # angles are written in degrees, so they come back within float
+    # precision but not always bit for bit
+    values = [
+        fill_grid.angle,
+        fill_grid.origin_u,
+        fill_grid.origin_v,
+        fill_grid.shift,
+        fill_grid.offset,
+    ] + fill_grid.segments
+    read_values = [
+        read_grid.angle,
+        read_grid.origin_u,
+        read_grid.origin_v,
+        read_grid.shift,
+        read_grid.offset,
+    ] + read_grid.segments
+    return len(values) == len(read_values) and all(
+        isclose(x, y, rel_tol=1e-12, abs_tol=1e-12) for x, y in zip(values, read_values)
+    )
+
+
+def check_streaming(args):
+    """segment arrays and generators give the same pattern as a list"""
+    np = patmaker.np
+    if np is None:
+        return 0, []
+
+    failed = []
+    checked = 0
+    with bench.rhino_standins():
+        for name, domain, lines, allow_expansion in bench.make_cases(
+            args.seed, args.lines
+        ):
+            bounds = (
+                bench.STANDIN_GEOMETRY.Point2f(0.0, 0.0),
+                bench.STANDIN_GEOMETRY.Point2f(*domain),
+            )
+            segments = np.array(
+                [(x.From.X, x.From.Y, x.To.X, x.To.Y) for x in lines]
+            )
+            inputs = [
+                lines,
+                (x for x in lines),
+                segments,
+                (segments[idx : idx + 7] for idx in range(0, len(segments), 7)),
+            ]
+            hatches = [
+                patmaker.make_pattern(
+                    "check", x, bounds, allow_expansion=allow_expansion
+                )
+                for x in inputs
+            ]
+            checked += 1
+            expected = _hatch_values(hatches[0])
+            if any(_hatch_values(x) != expected for x in hatches[1:]):
+                failed.append(name)
+    return checked, failed
+
+
+def check_processes(args):
+    """grids built in a process pool give the same pattern as serial"""
+    failed = []
+    checked = 0
+    with bench.rhino_standins():
+        for name, domain, lines, allow_expansion in bench.make_cases(
+            args.seed, args.lines
+        ):
+            bounds = (
+                bench.STANDIN_GEOMETRY.Point2f(0.0, 0.0),
+                bench.STANDIN_GEOMETRY.Point2f(*domain),
+            )
+            hatches = [
+                patmaker.make_pattern(
+                    "check",
+                    lines,
+                    bounds,
+                    allow_expansion=allow_expansion,
+                    processes=processes,
+                )
+                for processes in (1, 2)
+            ]
+            checked += 1
+            if _hatch_values(hatches[0]) != _hatch_values(hatches[1]):
+                failed.append(name)
+    return checked, failed
+
+
+def _hatch_values(hatch):
+    return [
+        (
+            x.Angle,
+            x.BasePoint.X,
+            x.BasePoint.Y,
+            x.Offset.X,
+            x.Offset.Y,
+            list(x.Dashes),
+        )
+        for x in hatch.HatchLines
+    ]
+
+
+CHECKS = [
+    ("shift", check_shift),
+    ("safe grids", check_safe_grids),
+    ("grid params", check_grid_params),
+    ("dedupe", check_dedupe),
+    ("grids", check_grids),
+    ("pat", check_pat),
+    ("streaming", check_streaming),
+    ("processes", check_processes),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tiles", type=int, default=16, help="max shift tiles")
+    parser.add_argument("--expansions", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--lines", type=int, default=100)
+    parser.add_argument("--check", default="", help="only checks containing this")
+    args = parser.parse_args(argv)
+
+    all_passed = True
+    for name, check in CHECKS:
+        if args.check not in name:
+            continue
+        checked, failed = check(args)
+        all_passed = all_passed and not failed
+        print(
+            "{:<6}{:<14}{:>8} cases  {}".format(
+                "FAIL" if failed else "ok",
+                name,
+                checked,
+                check.__doc__,
+            )
+        )
+        for case in failed[:10]:
+            print("      {}".format(case))
+    return 0 if all_passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())